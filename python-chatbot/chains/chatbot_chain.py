@@ -3,7 +3,7 @@ Hybrid Chatbot Chain with LangChain
 Cart-aware chatbot with conversation history
 
 Flow:
-1. User input → Model detects if tools are needed
+1. User input → Keyword router or function model detects if tools are needed
 2. If tools needed → Execute tools → Format response naturally
 3. If no tools → Generate natural dialog response
 4. Cart state is passed from Node.js and included in context
@@ -15,42 +15,97 @@ Uses LangChain components:
 - Cart state management
 """
 
-import json
-import httpx
-from typing import Dict, List, Any
-from langchain_ollama import ChatOllama
+import re
+import time
+import orjson
+import asyncio
+import logging
+import functools
+from collections import OrderedDict
+from typing import Dict, List, Any, AsyncIterator
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough, RunnableLambda
+from langchain_core.runnables import Runnable, RunnableConfig
 from tools.bakery_tools import bakery_tools
 from utils.config import config
+from utils.formatting import format_rupiah, format_thousands
+from utils.http import http_client, ollama_client, OLLAMA_CLIENT_KWARGS
+from utils.semantic_cache import semantic_cache
+
+logger = logging.getLogger(__name__)
+
+# Dispatch tables for the per-turn hot path
+_ROLE_MAP = {"user": HumanMessage, "assistant": AIMessage, "system": SystemMessage}
+_TOOLS_BY_NAME = {tool.name: tool for tool in bakery_tools}
+
+
+async def _supports_tools(model: str) -> bool | None:
+    """Check tool-calling support via Ollama /api/show metadata (no inference needed); None if unknown"""
+    try:
+        response = await ollama_client.post("/api/show", json={"model": model}, timeout=5.0)
+        response.raise_for_status()
+        capabilities = response.json().get("capabilities")
+        # Older Ollama servers don't report capabilities at all; that is "unknown", not "no"
+        if capabilities is None:
+            return None
+        return "tools" in capabilities
+    except Exception as e:
+        logger.warning(f"Capability probe for {model} failed: {e}")
+        return None
+
+
+# Models are created lazily on first use so importing this module stays cheap;
+# main.py loads them into Ollama in the background at startup (warm_up)
+@functools.cache
+def get_dialog_model():
+    """Dialog model for natural responses"""
+    from langchain_ollama import ChatOllama
+    return ChatOllama(
+        model=config.DIALOG_MODEL,
+        base_url=config.OLLAMA_BASE_URL,
+        temperature=config.DIALOG_TEMPERATURE,
+        num_predict=config.DIALOG_NUM_PREDICT,
+        keep_alive=config.OLLAMA_KEEP_ALIVE,
+        client_kwargs=OLLAMA_CLIENT_KWARGS,
+    )
 
-# Initialize model
-gemma_model = ChatOllama(
-    model=config.DIALOG_MODEL,
-    base_url=config.OLLAMA_BASE_URL,
-    temperature=0.1,
-)
 
-# Bind tools to model
-gemma_with_tools = gemma_model.bind_tools(bakery_tools)
+@functools.cache
+def get_function_model():
+    """Small function model for tool detection"""
+    from langchain_ollama import ChatOllama
+    return ChatOllama(
+        model=config.FUNCTION_MODEL,
+        base_url=config.OLLAMA_BASE_URL,
+        temperature=config.FUNCTION_TEMPERATURE,
+        top_p=config.FUNCTION_TOP_P,
+        num_predict=config.FUNCTION_NUM_PREDICT,
+        keep_alive=config.OLLAMA_KEEP_ALIVE,
+        client_kwargs=OLLAMA_CLIENT_KWARGS,
+    )
+
+
+@functools.cache
+def get_tool_model(model_name: str):
+    """Tool-bound detection model (FUNCTION_MODEL, or DIALOG_MODEL as fallback)"""
+    model = get_function_model() if model_name == config.FUNCTION_MODEL else get_dialog_model()
+    return model.bind_tools(bakery_tools)
 
 FUNCTION_DETECTION_PROMPT = """You are a TOOL CALLER for a bakery shop chatbot. You CALL TOOLS based on user intent.
 
 Available tools:
 - get_menu(): Get the list of available products and prices
 - check_availability(product_name, quantity): Check if a product is in stock
-- add_to_cart(product_name, quantity): Add item to cart when customer wants to order
+- add_to_cart(items): Add one or more items to cart when customer wants to order. items = [{{"product_name": ..., "quantity": ...}}]
 - view_cart(): Show current cart contents
 - remove_from_cart(product_name): Remove item from cart
 - confirm_order(customer_name): Create the final order from cart
 
-CURRENT CART: {cart_info}
-
 RULES:
 1. "menu", "lihat menu", "apa saja", "daftar produk" → get_menu()
-2. "pesan", "beli", "order", "mau X", "tambah X" → add_to_cart(product_name, quantity)
+2. "pesan", "beli", "order", "mau X", "tambah X" → add_to_cart(items=[...])
+   Multiple products → ONE call: "mau 2 croissant dan 1 red velvet" → add_to_cart(items=[{{"product_name": "croissant", "quantity": 2}}, {{"product_name": "red velvet", "quantity": 1}}])
 3. "hapus", "batal item", "remove" → remove_from_cart(product_name)
 4. "lihat keranjang", "cart", "isi pesanan" → view_cart()
 5. "konfirmasi", "checkout", "selesai pesan", "ok pesan", "jadi" → confirm_order()
@@ -64,8 +119,6 @@ DIALOG_GENERATION_PROMPT = """Anda adalah asisten toko kue "Bakery PoS" yang ram
 
 TUGAS: Baca "Tool results" dan buat respons natural untuk customer.
 
-STATUS KERANJANG SAAT INI: {cart_info}
-
 ATURAN:
 - Gunakan bahasa yang sama dengan customer
 - Format harga: Rp XX.XXX
@@ -88,15 +141,135 @@ Mau tambah yang lain atau ketik 'konfirmasi pesanan' untuk checkout?"
 
 PENTING: JANGAN memberikan respons kosong."""
 
+HISTORY_SUMMARY_PROMPT = """Summarize this bakery conversation in 3 bullets:
+- what the customer asked for or ordered
+- decisions or preferences they stated
+- anything still unresolved
+Plain text, same language as the customer, no markdown."""
+
+# Keyword router for obvious read-only intents; these skip the detection model entirely.
+# confirm_order is never routed here: it creates a real order, so the model decides.
+INTENT_PATTERNS = [
+    (re.compile(r"\b(menu|lihat menu|daftar produk|apa saja)\b", re.I), ("get_menu", {})),
+    (re.compile(r"\b(lihat keranjang|isi keranjang|keranjang saya|cart|pesanan saya)\b", re.I), ("view_cart", {})),
+]
+
+# Messages that mention quantities, products, names, negations, questions or the
+# trigger words of the other tools (checkout, ordering, stock) need the model
+ROUTER_GUARD = re.compile(
+    r"\b(beli|order|mau|tambah|add|hapus|batal|remove|nama|name|\d+"
+    r"|tidak|gak|nggak|jangan|belum|cara|gimana|bagaimana"
+    r"|konfirmasi|checkout|jadi|selesai|pesan|ada|tersedia|stok|kosongkan)\b|\?",
+    re.I
+)
+
+# Tools whose responses are never cached: orders change state, stock changes per order
+UNCACHEABLE_TOOLS = {"confirm_order", "create_order_actual", "check_availability"}
+
+# Tools whose results are rendered directly without the dialog model
+READ_ONLY_TOOLS = {"get_menu", "view_cart"}
+
+# Cart state changes every turn, so it goes in its own message right before the user turn
+DETECTION_CART_CONTEXT = "CURRENT CART: {cart_info}"
+DIALOG_CART_CONTEXT = "STATUS KERANJANG SAAT INI: {cart_info}"
+
+# Prompt templates are built once at import. The static system prompt comes first
+# and history follows unchanged, so Ollama can reuse its KV cache for that prefix;
+# only the cart context and the latest user turn are recomputed.
+DETECTION_TEMPLATE = ChatPromptTemplate.from_messages([
+    ("system", FUNCTION_DETECTION_PROMPT),
+    MessagesPlaceholder("history"),
+    ("system", DETECTION_CART_CONTEXT),
+    ("human", "{input}"),
+])
 
-class HybridChatbotChain:
-    """Hybrid chain with cart awareness"""
+DIALOG_TEMPLATE = ChatPromptTemplate.from_messages([
+    ("system", DIALOG_GENERATION_PROMPT),
+    MessagesPlaceholder("history"),
+    ("system", DIALOG_CART_CONTEXT),
+    ("human", "{input}"),
+    MessagesPlaceholder("tool_messages", optional=True),
+])
+
+
+class HybridChatbotChain(Runnable[Dict[str, Any], Dict[str, Any]]):
+    """Hybrid chain with cart awareness (served by LangServe for invoke and stream)"""
     
     def __init__(self):
-        self.model_with_tools = gemma_with_tools
-        self.dialog_model = gemma_model
+        # Detection model name (verified by probe_capabilities at startup);
+        # None = intent-router-only mode (no tool-capable model available)
+        self.detection_model_name = config.FUNCTION_MODEL
+        self.semantic_cache = semantic_cache
+        # session_id -> (summary, anchor message); anchor is the last message the summary covers
+        self._history_summaries: OrderedDict = OrderedDict()
+    
+    @property
+    def model_with_tools(self):
+        """Tool-bound model for detection, or None in intent-router-only mode"""
+        if self.detection_model_name is None:
+            return None
+        return get_tool_model(self.detection_model_name)
+    
+    @property
+    def dialog_model(self):
+        """Model for natural-language responses"""
+        return get_dialog_model()
+    
+    async def probe_capabilities(self):
+        """
+        Verify tool support of both models once at startup via /api/show
+        
+        Falls back to the dialog model for detection when the function model
+        cannot call tools, and to intent-router-only mode when neither can.
+        An unreachable Ollama leaves the current setup untouched.
+        """
+        function_ok, dialog_ok = await asyncio.gather(
+            _supports_tools(config.FUNCTION_MODEL),
+            _supports_tools(config.DIALOG_MODEL),
+        )
+        
+        if function_ok is not False:
+            return
+        if dialog_ok is not False:
+            logger.warning(f"{config.FUNCTION_MODEL} does not support tools, using {config.DIALOG_MODEL} for detection")
+            self.detection_model_name = config.DIALOG_MODEL
+        else:
+            logger.error(
+                f"Neither {config.FUNCTION_MODEL} nor {config.DIALOG_MODEL} supports tool calling! "
+                "Running in intent-router-only mode: only keyword-matched intents will call tools."
+            )
+            self.detection_model_name = None
+    
+    async def warm_up(self):
+        """
+        Load the models into Ollama and pin them resident (keep_alive)
+        
+        An empty generate/embed request loads a model without running
+        inference, so the first real request skips the model-load time.
+        """
+        requests = [("/api/generate", {"model": config.DIALOG_MODEL})]
+        if self.detection_model_name and self.detection_model_name != config.DIALOG_MODEL:
+            requests.append(("/api/generate", {"model": self.detection_model_name}))
+        requests.append(("/api/embed", {"model": config.EMBED_MODEL, "input": ""}))
         
-    def invoke(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        for path, payload in requests:
+            try:
+                # Loading a model from disk can take far longer than a normal request
+                response = await ollama_client.post(
+                    path, json={**payload, "keep_alive": config.OLLAMA_KEEP_ALIVE}, timeout=300.0
+                )
+                response.raise_for_status()
+                logger.info(f"Warmed up {payload['model']}")
+            except Exception as e:
+                logger.warning(f"Warm-up of {payload['model']} failed: {e}")
+    
+    def invoke(self, inputs: Dict[str, Any], config: RunnableConfig | None = None, **kwargs) -> Dict[str, Any]:
+        """Not supported: the shared HTTP clients and menu lock are bound to one event loop"""
+        # asyncio.run() would start a fresh loop per call while the module-level
+        # httpx clients and _menu_lock stay attached to the first one
+        raise NotImplementedError("HybridChatbotChain is async-only; use ainvoke() or astream()")
+        
+    async def ainvoke(self, inputs: Dict[str, Any], config: RunnableConfig | None = None, **kwargs) -> Dict[str, Any]:
         """
         Process user input through hybrid chain
         
@@ -106,36 +279,124 @@ class HybridChatbotChain:
         Returns:
             Dict with 'output', 'tool_used', 'tool_results', 'cart_action' keys
         """
+        # Runs inside a chain run so callbacks, tracing and astream_events see the turn
+        return await self._acall_with_config(self._arun_turn, inputs, config, **kwargs)
+    
+    async def astream(self, inputs: Dict[str, Any], config: RunnableConfig | None = None, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the response token by token (LangServe /chat/stream)
+        
+        Yields a first chunk with 'tool_used', 'tool_results', 'cart_action'
+        (when tools ran), then {'token': ...} chunks from the dialog model.
+        """
+        async def input_stream():
+            yield inputs
+        
+        async for chunk in self.atransform(input_stream(), config, **kwargs):
+            yield chunk
+    
+    async def atransform(self, input_stream: AsyncIterator[Dict[str, Any]], config: RunnableConfig | None = None, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """Streaming entry point wrapped in a chain run (/chat/stream_log, playground, astream_events)"""
+        async for chunk in self._atransform_stream_with_config(input_stream, self._astream_turn, config, **kwargs):
+            yield chunk
+    
+    async def _arun_turn(self, inputs: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        """Full (non-streaming) turn; config carries the child callbacks for the model calls"""
+        turn = await self._prepare_turn(inputs, config)
+        if turn["dialog_messages"] is None:
+            self._cache_result(turn, turn["result"])
+            return turn["result"]
+        
+        final_response = await self.dialog_model.ainvoke(turn["dialog_messages"], config=config)
+        
+        result = {"output": final_response.content, **turn["result"]}
+        self._cache_result(turn, result)
+        return result
+    
+    async def _astream_turn(self, input_stream: AsyncIterator[Dict[str, Any]], config: RunnableConfig) -> AsyncIterator[Dict[str, Any]]:
+        """Streaming turn; the input stream holds a single inputs dict"""
+        inputs = {}
+        async for chunk in input_stream:
+            inputs = chunk
+        
+        started = time.perf_counter()
+        turn = await self._prepare_turn(inputs, config)
+        result = turn["result"]
+        
+        if turn["dialog_messages"] is None:
+            # Cached or rendered response: nothing to generate
+            self._cache_result(turn, result)
+            yield {key: value for key, value in result.items() if key != "output"}
+            yield {"token": result.get("output", "")}
+            return
+        
+        yield result
+        
+        tokens = []
+        async for chunk in self.dialog_model.astream(turn["dialog_messages"], config=config):
+            if not tokens:
+                logger.info(f"First token latency: {(time.perf_counter() - started) * 1000:.0f}ms")
+            tokens.append(chunk.content)
+            yield {"token": chunk.content}
+        
+        self._cache_result(turn, {"output": "".join(tokens), **result})
+    
+    async def _prepare_turn(self, inputs: Dict[str, Any], run_config: RunnableConfig | None = None) -> Dict[str, Any]:
+        """
+        Run everything before dialog generation: cache lookup, tool detection, tool execution
+        
+        Returns:
+            Dict with 'result' (response fields known so far), 'dialog_messages'
+            (None when 'result' is already the final response) and 'cache_key'
+        """
         messages = inputs.get("messages", [])
         cart = inputs.get("cart", [])
         session_id = inputs.get("session_id", "")
         
         if not messages:
-            return {"output": "Maaf, tidak ada pesan yang diterima."}
+            return {"result": {"output": "Maaf, tidak ada pesan yang diterima."}, "dialog_messages": None, "cache_key": None}
         
         # Get the latest user message
         user_message = messages[-1].get("content", "") if isinstance(messages[-1], dict) else str(messages[-1])
         
-        # Build conversation history for context
-        history = self._build_history(messages[:-1])
+        # Normalized view of the incoming cart, computed once and shared by the
+        # semantic cache (signature) and the cart update below (name index)
+        cart_key = self._cart_key(cart)
         
-        # Format cart info for prompts
+        # Format cart info for prompts (once per turn)
         cart_info = self._format_cart_info(cart)
         
-        # Step 1: Use model to detect if tools are needed
-        detection_prompt = FUNCTION_DETECTION_PROMPT.format(cart_info=cart_info)
-        detection_messages = [
-            SystemMessage(content=detection_prompt),
-            *history,
-            HumanMessage(content=user_message)
-        ]
+        # Conversation history is only built for the model calls that use it; routed
+        # read-only turns are rendered without it and never wait for a summary
+        history = None
         
-        function_response = self.model_with_tools.invoke(detection_messages)
+        # Step 1: Detect if tools are needed (keyword router first, model only if no clear match)
+        tool_calls = self._route_intent(user_message)
+        cache_key = None
+        if tool_calls is None and self.model_with_tools is not None:
+            # Semantic cache: only detection-model turns can save a model call, and only
+            # read-only tool answers are ever stored. Entries are keyed on the same cart
+            # AND the same prior conversation, so replies never carry over between sessions
+            if len(messages) <= config.SEMANTIC_CACHE_MAX_HISTORY:
+                query_embedding = await self.semantic_cache.embed(user_message)
+                if query_embedding is not None:
+                    context_signature = hash((cart_key, self._history_key(messages[:-1])))
+                    cached = self.semantic_cache.lookup(query_embedding, context_signature)
+                    if cached:
+                        return {"result": cached, "dialog_messages": None, "cache_key": None}
+                    cache_key = (query_embedding, context_signature)
+            
+            history = await self._build_history(messages[:-1], session_id)
+            detection_messages = DETECTION_TEMPLATE.format_messages(
+                cart_info=cart_info, history=history, input=user_message
+            )
+            function_response = await self.model_with_tools.ainvoke(detection_messages, config=run_config)
+            tool_calls = getattr(function_response, "tool_calls", None)
         
         # Step 2: Check if tools were called
-        if hasattr(function_response, 'tool_calls') and function_response.tool_calls:
-            # Execute tools
-            tool_results = self._execute_tools(function_response.tool_calls)
+        if tool_calls:
+            # Execute tools (concurrently when the model requested several)
+            tool_results = await self._execute_tools(tool_calls)
             
             # Extract cart actions from tool results
             cart_action = self._extract_cart_action(tool_results)
@@ -144,7 +405,7 @@ class HybridChatbotChain:
             confirm_order_data = self._check_confirm_order(tool_results, cart)
             if confirm_order_data:
                 # Actually create the order via API
-                order_result = self._create_order(cart, confirm_order_data.get("customer_name", "Guest Customer"))
+                order_result = await self._create_order(cart, confirm_order_data.get("customer_name", "Guest Customer"))
                 if order_result:
                     tool_results.append({
                         "tool": "create_order_actual",
@@ -153,125 +414,302 @@ class HybridChatbotChain:
                     })
                     cart_action = {"type": "clear"}
             
+            result = {
+                "tool_used": True,
+                "tool_results": tool_results,
+                "cart_action": cart_action
+            }
+            
+            # Read-only results (menu, cart) are rendered directly, no dialog model call
+            if self._is_read_only(tool_results, cart_action):
+                result["output"] = self._render_read_only(tool_results, cart)
+                return {"result": result, "dialog_messages": None, "cache_key": cache_key}
+            
             # Update cart_info with any additions from this turn
             updated_cart_info = cart_info
             if cart_action and cart_action.get("type") == "add":
                 # Build what the cart will look like after the action
-                updated_cart = list(cart)
+                # (copies, so the incoming cart and cart_action items stay untouched)
+                updated_cart = [dict(c) for c in cart]
+                by_name = {name: c for (name, _), c in zip(cart_key, updated_cart)}
                 for item in cart_action.get("items", []):
-                    existing = next((c for c in updated_cart if c.get("product_name", "").lower() == item["product_name"].lower()), None)
+                    key = item["product_name"].lower()
+                    existing = by_name.get(key)
                     if existing:
                         existing["quantity"] = existing.get("quantity", 1) + item.get("quantity", 1)
                         if item.get("price"):
                             existing["price"] = item["price"]
                     else:
-                        updated_cart.append(item)
-                updated_cart_info = self._format_cart_info(updated_cart)
+                        by_name[key] = dict(item)
+                        updated_cart.append(by_name[key])
+                if updated_cart != cart:
+                    updated_cart_info = self._format_cart_info(updated_cart)
             
             # Step 3: Format response
-            dialog_prompt = DIALOG_GENERATION_PROMPT.format(cart_info=updated_cart_info)
-            dialog_messages = [
-                SystemMessage(content=dialog_prompt),
-                *history,
-                HumanMessage(content=user_message),
-                AIMessage(content=f"Tool results: {json.dumps(tool_results, ensure_ascii=False)}")
-            ]
-            
-            final_response = self.dialog_model.invoke(dialog_messages)
-            
-            return {
-                "output": final_response.content,
-                "tool_used": True,
-                "tool_results": tool_results,
-                "cart_action": cart_action
-            }
+            if history is None:
+                history = await self._build_history(messages[:-1], session_id)
+            dialog_messages = DIALOG_TEMPLATE.format_messages(
+                cart_info=updated_cart_info,
+                history=history,
+                input=user_message,
+                tool_messages=[AIMessage(content=f"Tool results:\n{self._summarize_tool_results(tool_results)}")]
+            )
         else:
             # No tools needed, natural dialog
-            dialog_prompt = DIALOG_GENERATION_PROMPT.format(cart_info=cart_info)
-            dialog_messages = [
-                SystemMessage(content=dialog_prompt),
-                *history,
-                HumanMessage(content=user_message)
-            ]
-            
-            final_response = self.dialog_model.invoke(dialog_messages)
+            if history is None:
+                history = await self._build_history(messages[:-1], session_id)
+            dialog_messages = DIALOG_TEMPLATE.format_messages(
+                cart_info=cart_info, history=history, input=user_message
+            )
             
-            return {
-                "output": final_response.content,
-                "tool_used": False
-            }
+            result = {"tool_used": False}
+        
+        return {"result": result, "dialog_messages": dialog_messages, "cache_key": cache_key}
+    
+    def _cache_result(self, turn: Dict[str, Any], result: Dict[str, Any]):
+        """Store a finished response in the semantic cache when it is safe to reuse"""
+        if turn["cache_key"] is not None and self._is_cacheable(result):
+            query_embedding, context_signature = turn["cache_key"]
+            self.semantic_cache.store(query_embedding, context_signature, result)
+    
+    def _route_intent(self, user_message: str) -> List[Dict] | None:
+        """Map obvious intents to tool calls without the detection model; None if no single clear match"""
+        text = user_message.lower()
+        if ROUTER_GUARD.search(text):
+            return None
+        
+        matches = {intent: args for pattern, (intent, args) in INTENT_PATTERNS if pattern.search(text)}
+        if len(matches) != 1:
+            return None
+        
+        intent, args = next(iter(matches.items()))
+        return [{"name": intent, "args": dict(args)}]
+    
+    def _cart_key(self, cart: List) -> tuple:
+        """Normalized (lower-cased name, quantity) view of the cart; part of the cache signature"""
+        return tuple((item.get("product_name", "").lower(), item.get("quantity", 1)) for item in cart)
+    
+    def _history_key(self, messages: List) -> tuple:
+        """(role, content) view of the prior messages; part of the cache signature"""
+        return tuple(
+            (msg.get("role", "user"), msg.get("content", "")) if isinstance(msg, dict) else (msg.type, msg.content)
+            for msg in messages
+        )
+    
+    def _is_cacheable(self, result: Dict[str, Any]) -> bool:
+        """Only cache read-only tool responses (no cart mutation, no order, no failed tools)"""
+        # Free-form replies can echo the customer's own words (names, details),
+        # so similar-but-different messages must never get them back
+        if not result.get("output") or not result.get("tool_used"):
+            return False
+        if result.get("cart_action") is not None:
+            return False
+        return all(
+            tr.get("success")
+            and tr.get("data", {}).get("success", True)
+            and tr.get("tool") not in UNCACHEABLE_TOOLS
+            for tr in result.get("tool_results", [])
+        )
     
     def _format_cart_info(self, cart: List) -> str:
         """Format cart contents for inclusion in prompts"""
         if not cart:
             return "Kosong (belum ada item)"
         
-        items = []
+        lines = []
         total = 0
         for item in cart:
             qty = item.get("quantity", 1)
             name = item.get("product_name", "Unknown")
             price = item.get("price")
-            line = f"• {qty}x {name}"
             if price:
                 subtotal = float(price) * qty
                 total += subtotal
-                line += f" - Rp {int(subtotal):,}".replace(",", ".")
-            items.append(line)
+                lines.append(f"• {qty}x {name} - Rp {format_thousands(subtotal)}")
+            else:
+                lines.append(f"• {qty}x {name}")
         
-        result = "\n".join(items)
         if total > 0:
-            result += f"\nTotal: Rp {int(total):,}".replace(",", ".")
-        return result
+            lines.append(f"Total: Rp {format_thousands(total)}")
+        return "\n".join(lines)
+    
+    def _is_read_only(self, tool_results: List[Dict], cart_action: dict | None) -> bool:
+        """True when every tool is a successful menu/cart read that needs no natural-language synthesis"""
+        return bool(tool_results) and cart_action is None and all(
+            tr.get("tool") in READ_ONLY_TOOLS and tr.get("success") and tr.get("data", {}).get("success", True)
+            for tr in tool_results
+        )
+    
+    def _render_read_only(self, tool_results: List[Dict], cart: List) -> str:
+        """Render read-only tool results in the same bullet format the dialog prompt asks for"""
+        parts = []
+        for tr in tool_results:
+            if tr["tool"] == "get_menu":
+                parts.append(self._render_menu(tr["data"]))
+            elif tr["tool"] == "view_cart":
+                parts.append(self._render_view_cart(cart))
+        return "\n\n".join(parts)
     
-    def _build_history(self, messages: List) -> List:
-        """Convert message history to LangChain message objects"""
+    def _render_menu(self, data: Dict) -> str:
+        """Render get_menu data as a bullet list"""
+        lines = []
+        for item in data.get("menu", []):
+            line = f"• {item['name']} - {format_rupiah(item['price'])}"
+            if item.get("description"):
+                line += f"\n  {item['description']}"
+            lines.append(line)
+        if not lines:
+            return "Maaf, saat ini belum ada menu yang tersedia."
+        return "Menu Bakery PoS:\n\n" + "\n".join(lines) + "\n\nMau pesan yang mana?"
+    
+    def _render_view_cart(self, cart: List) -> str:
+        """Render the current cart as a bullet list with total"""
+        if not cart:
+            return "Keranjang Anda masih kosong. Ketik 'lihat menu' untuk melihat produk kami."
+        return (
+            f"Keranjang Anda:\n\n{self._format_cart_info(cart)}"
+            "\n\nMau tambah yang lain atau ketik 'konfirmasi pesanan' untuk checkout?"
+        )
+    
+    def _summarize_tool_results(self, tool_results: List[Dict]) -> str:
+        """Compact plain-text summary of tool results for the dialog prompt (far fewer tokens than JSON)"""
+        lines = []
+        for tr in tool_results:
+            tool_name = tr.get("tool")
+            data = tr.get("data", {})
+            if not tr.get("success") or not data.get("success", True):
+                lines.append(f"ERROR ({tool_name}): {tr.get('error') or data.get('error', 'Gagal')}")
+                continue
+            
+            if tool_name == "get_menu":
+                lines.append("MENU: " + ", ".join(f"{m['name']} {format_rupiah(m['price'])}" for m in data.get("menu", [])))
+            elif tool_name == "check_availability":
+                status = "TERSEDIA" if data.get("available") else "TIDAK TERSEDIA"
+                line = f"{status}: {data.get('product_name', '')}"
+                if data.get("price"):
+                    line += f" {format_rupiah(data['price'])}"
+                if data.get("message"):
+                    line += f" ({data['message']})"
+                lines.append(line)
+            elif tool_name == "add_to_cart":
+                items = data.get("cart_action", {}).get("items", [])
+                lines.append("ADDED: " + ", ".join(f"{i['quantity']}x {i['product_name']}" for i in items))
+                lines.extend(f"NOTE: {w}" for w in data.get("warnings", []))
+            elif tool_name == "remove_from_cart":
+                items = data.get("cart_action", {}).get("items", [])
+                lines.append("REMOVED: " + ", ".join(i["product_name"] for i in items))
+            elif tool_name == "view_cart":
+                lines.append("VIEW CART: tampilkan isi keranjang saat ini")
+            elif tool_name == "confirm_order":
+                lines.append(f"CONFIRM ORDER: atas nama {data.get('customer_name', 'Guest Customer')}")
+            elif tool_name == "create_order_actual":
+                order = data.get("order", {})
+                items = ", ".join(f"{i['quantity']}x {i['product']}" for i in order.get("items", []))
+                lines.append(f"ORDER CREATED: No {order.get('order_number')}, {items}, Total {order.get('formatted_total')}")
+            elif data.get("message"):
+                lines.append(f"{tool_name.upper()}: {data['message']}")
+        return "\n".join(lines)
+    
+    async def _build_history(self, messages: List, session_id: str = "") -> List:
+        """Convert message history to LangChain message objects, summarizing older turns"""
         history = []
         for msg in messages:
             if isinstance(msg, dict):
-                role = msg.get("role", "user")
-                content = msg.get("content", "")
-                
-                if role == "user":
-                    history.append(HumanMessage(content=content))
-                elif role == "assistant":
-                    history.append(AIMessage(content=content))
-                elif role == "system":
-                    history.append(SystemMessage(content=content))
+                # Unknown roles are skipped
+                message_class = _ROLE_MAP.get(msg.get("role", "user"))
+                if message_class:
+                    history.append(message_class(content=msg.get("content", "")))
             else:
                 history.append(msg)
         
-        # Limit history to last 10 messages to avoid context overflow
-        return history[-10:]
+        if len(history) <= config.HISTORY_SUMMARY_THRESHOLD:
+            return history
+        
+        # Long conversation: compact summary of older turns + the most recent messages
+        recent = history[-config.HISTORY_RECENT_MESSAGES:]
+        pending, summary = await self._summarize_history(session_id, history[:-config.HISTORY_RECENT_MESSAGES])
+        if summary is None:
+            # Limit history to last 10 messages to avoid context overflow
+            return history[-10:]
+        return [SystemMessage(content=f"Earlier conversation summary: {summary}"), *pending, *recent]
     
-    def _execute_tools(self, tool_calls: List) -> List[Dict[str, Any]]:
-        """Execute tool calls and return results"""
-        results = []
+    async def _summarize_history(self, session_id: str, old: List) -> tuple:
+        """
+        Return (unsummarized messages, summary) for the older part of the history
         
-        for tool_call in tool_calls:
-            tool_name = tool_call.get("name")
-            tool_args = tool_call.get("args", {})
-            
-            # Find and execute the tool
-            for tool in bakery_tools:
-                if tool.name == tool_name:
-                    try:
-                        result = tool.invoke(tool_args)
-                        result_data = json.loads(result) if isinstance(result, str) else result
-                        results.append({
-                            "tool": tool_name,
-                            "success": True,
-                            "data": result_data
-                        })
-                    except Exception as e:
-                        results.append({
-                            "tool": tool_name,
-                            "success": False,
-                            "error": str(e)
-                        })
-                    break
-        
-        return results
+        The summary is cached per session and only regenerated once enough new
+        messages have accumulated since the last one, so it stays stable (and
+        KV-cache friendly) across turns.
+        """
+        if not session_id:
+            return [], None
+        
+        cached = self._history_summaries.get(session_id)
+        to_summarize = old
+        previous = None
+        if cached:
+            summary, anchor = cached
+            # Keep the previous summary: it covers turns that may have left the window
+            previous = summary
+            # Locate the last summarized message; Node.js slides the history window
+            anchor_index = next(
+                (i for i in range(len(old) - 1, -1, -1) if (old[i].type, old[i].content) == anchor),
+                None
+            )
+            if anchor_index is not None:
+                pending = old[anchor_index + 1:]
+                if len(pending) < config.HISTORY_SUMMARY_REFRESH:
+                    self._history_summaries.move_to_end(session_id)
+                    return pending, summary
+                to_summarize = pending
+        
+        summary_messages = [SystemMessage(content=HISTORY_SUMMARY_PROMPT)]
+        if previous:
+            summary_messages.append(SystemMessage(content=f"Ringkasan sebelumnya: {previous}"))
+        summary_messages.extend(to_summarize)
+        summary_messages.append(HumanMessage(content="Ringkas percakapan di atas."))
+        
+        try:
+            response = await self.dialog_model.ainvoke(summary_messages)
+        except Exception as e:
+            logger.warning(f"History summarization failed: {e}")
+            return [], None
+        
+        summary = response.content.strip()
+        self._history_summaries[session_id] = (summary, (old[-1].type, old[-1].content))
+        self._history_summaries.move_to_end(session_id)
+        if len(self._history_summaries) > config.HISTORY_SUMMARY_MAX_SESSIONS:
+            self._history_summaries.popitem(last=False)
+        return [], summary
+    
+    async def _execute_tools(self, tool_calls: List) -> List[Dict[str, Any]]:
+        """Execute tool calls concurrently and return results in call order"""
+        results = await asyncio.gather(*(self._execute_tool(tool_call) for tool_call in tool_calls))
+        return [result for result in results if result is not None]
+    
+    async def _execute_tool(self, tool_call: Dict) -> Dict[str, Any] | None:
+        """Execute a single tool call; returns None for unknown tools"""
+        tool_name = tool_call.get("name")
+        tool_args = tool_call.get("args", {})
+        
+        # Find and execute the tool
+        tool = _TOOLS_BY_NAME.get(tool_name)
+        if tool is None:
+            return None
+        try:
+            result = await tool.ainvoke(tool_args)
+            result_data = orjson.loads(result) if isinstance(result, str) else result
+            return {
+                "tool": tool_name,
+                "success": True,
+                "data": result_data
+            }
+        except Exception as e:
+            return {
+                "tool": tool_name,
+                "success": False,
+                "error": str(e)
+            }
     
     def _extract_cart_action(self, tool_results: List[Dict]) -> dict | None:
         """Extract cart action from tool results"""
@@ -291,7 +729,7 @@ class HybridChatbotChain:
                 return data
         return None
     
-    def _create_order(self, cart: List, customer_name: str) -> dict | None:
+    async def _create_order(self, cart: List, customer_name: str) -> dict | None:
         """Actually create the order via Node.js backend API"""
         try:
             items = [{"product_name": item["product_name"], "quantity": item.get("quantity", 1)} for item in cart]
@@ -302,9 +740,7 @@ class HybridChatbotChain:
                 "notes": f"Order by {customer_name} via chatbot"
             }
             
-            response = httpx.Client(base_url=config.NODEJS_BACKEND_URL, timeout=30.0).post(
-                "/api/chatbot/create-order", json=payload
-            )
+            response = await http_client.post("/api/chatbot/create-order", json=payload)
             data = response.json()
             
             if data.get("success"):
@@ -327,7 +763,6 @@ class HybridChatbotChain:
 
 
 # Create singleton instance
-_chatbot_chain_impl = HybridChatbotChain()
-
-# Wrap with RunnableLambda to make it compatible with LangServe
-chatbot_chain = RunnableLambda(_chatbot_chain_impl.invoke)
+# HybridChatbotChain is a Runnable, so LangServe serves /chat/invoke via ainvoke
+# and /chat/stream via astream (tokens are streamed as they are generated)
+chatbot_chain = HybridChatbotChain()
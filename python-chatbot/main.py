@@ -3,11 +3,18 @@ FastAPI + LangServe Main Application
 Serves the hybrid chatbot chain as a REST API
 """
 
-from fastapi import FastAPI
+import sys
+import asyncio
+import secrets
+import ipaddress
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from langserve import add_routes
 from chains.chatbot_chain import chatbot_chain  # Back to Gemma3-only
 from utils.config import config
+from utils.http import http_client, ollama_client
+from tools.bakery_tools import invalidate_menu_cache
 import logging
 
 # Setup logging
@@ -21,7 +28,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Bakery PoS Chatbot API",
     version="1.0.0",
-    description="LangServe chatbot API with hybrid FunctionGemma + Qwen3 approach"
+    description="LangServe chatbot API with hybrid FunctionGemma + Qwen3 approach",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -33,6 +41,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Verify model tool support once at startup, then load models in the background
+@app.on_event("startup")
+async def prepare_models():
+    """Check model capabilities via Ollama /api/show and start the warm-up task"""
+    await chatbot_chain.probe_capabilities()
+    app.state.warm_up_task = asyncio.create_task(chatbot_chain.warm_up())
+
+# Close shared HTTP clients on shutdown
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Close pooled connections to the Node.js backend and Ollama"""
+    await http_client.aclose()
+    await ollama_client.aclose()
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -44,6 +66,24 @@ async def health_check():
         "dialog_model": config.DIALOG_MODEL
     }
 
+def _is_internal_caller(request: Request, secret: str) -> bool:
+    """Shared-secret check for /internal/* (loopback-only when no secret is configured)"""
+    if config.INTERNAL_SECRET:
+        return secrets.compare_digest(secret.encode(), config.INTERNAL_SECRET.encode())
+    try:
+        return request.client is not None and ipaddress.ip_address(request.client.host).is_loopback
+    except ValueError:
+        return False
+
+# Menu cache invalidation (called by Node.js after product changes)
+@app.post("/internal/invalidate-menu")
+async def invalidate_menu(request: Request, x_internal_secret: str = Header(default="")):
+    """Drop the cached menu so the next tool call refetches it"""
+    if not _is_internal_caller(request, x_internal_secret):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    invalidate_menu_cache()
+    return {"success": True}
+
 # Add LangServe routes for the chatbot chain
 # This creates endpoints:
 # - POST /chat/invoke - for single invocations
@@ -67,5 +107,9 @@ if __name__ == "__main__":
         "main:app",
         host=config.SERVICE_HOST,
         port=config.SERVICE_PORT,
-        reload=True
+        # reload implies a single worker; enable it for development only
+        reload=config.SERVICE_RELOAD,
+        workers=config.SERVICE_WORKERS,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
     )
@@ -0,0 +1,37 @@
+"""
+Keyword router tests: only unambiguous read-only requests skip the detection model
+"""
+
+import pytest
+
+from chains.chatbot_chain import chatbot_chain
+
+
+@pytest.mark.parametrize("message, intent", [
+    # Plain read-only requests are routed directly
+    ("lihat menu", "get_menu"),
+    ("menu hari ini", "get_menu"),
+    ("lihat keranjang", "view_cart"),
+    ("isi keranjang saya", "view_cart"),
+    ("pesanan saya", "view_cart"),
+    # Checkout is left to the model (confirm_order creates a real order)
+    ("konfirmasi pesanan saya", None),
+    ("checkout keranjang saya", None),
+    ("ok jadi, checkout cart", None),
+    ("selesai, itu saja", None),
+    # Ordering and stock questions belong to add_to_cart / check_availability
+    ("pesan croissant dari menu", None),
+    ("ada croissant di menu", None),
+    ("stok roti tawar di menu", None),
+    ("kosongkan keranjang", None),
+    # Quantities, negations and questions always need the model
+    ("2 croissant dari menu", None),
+    ("tidak jadi lihat keranjang", None),
+    ("menu apa saja?", None),
+])
+def test_route_intent(message, intent):
+    tool_calls = chatbot_chain._route_intent(message)
+    if intent is None:
+        assert tool_calls is None
+    else:
+        assert tool_calls == [{"name": intent, "args": {}}]
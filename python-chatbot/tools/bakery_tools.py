@@ -5,49 +5,120 @@ Calls Node.js Backend API endpoints
 Tools:
 - get_menu: Get all available products
 - check_availability: Check if a product is in stock
-- add_to_cart: Add item to cart (managed by Node.js)
+- add_to_cart: Add one or more items to cart (managed by Node.js)
 - view_cart: View current cart contents
 - remove_from_cart: Remove item from cart
 - confirm_order: Confirm and create the final order
 """
 
-import json
-import httpx
+import time
+import orjson
+import asyncio
+from typing import List
+from typing_extensions import NotRequired, TypedDict
 from langchain_core.tools import tool
 from utils.config import config
+from utils.formatting import format_rupiah
+from utils.http import http_client
+from utils.semantic_cache import semantic_cache
 
-# HTTP client for backend API
-http_client = httpx.Client(
-    base_url=config.NODEJS_BACKEND_URL,
-    timeout=30.0
-)
+def _dumps(data: dict) -> str:
+    """Serialize a tool result (orjson: faster than json, keeps non-ASCII as-is)"""
+    return orjson.dumps(data).decode()
+
+
+# In-process menu cache; the menu changes minutes-to-hours, not per request
+_menu_cache = {"data": None, "by_name": {}, "expires": 0.0}
+_menu_lock = asyncio.Lock()
+
+
+class CartItem(TypedDict):
+    """A product the customer wants to add to the cart"""
+    product_name: str
+    quantity: NotRequired[int]
+
+
+async def _get_menu_cached() -> list:
+    """Return the menu list, refetching from the backend once the TTL has expired"""
+    if _menu_cache["data"] is not None and time.monotonic() < _menu_cache["expires"]:
+        return _menu_cache["data"]
+
+    async with _menu_lock:
+        # Another request may have refreshed the cache while we waited
+        if _menu_cache["data"] is not None and time.monotonic() < _menu_cache["expires"]:
+            return _menu_cache["data"]
+
+        response = await http_client.get("/api/chatbot/menu")
+        data = response.json()
+        if not data.get("success"):
+            raise RuntimeError(data.get("error", "Gagal mengambil menu"))
+
+        menu = data["data"]["menu"]
+        _menu_cache["data"] = menu
+        _menu_cache["by_name"] = {item["name"].lower(): item for item in menu}
+        _menu_cache["expires"] = time.monotonic() + config.MENU_CACHE_TTL
+        return _menu_cache["data"]
+
+
+async def _get_menu_index() -> dict:
+    """Return the cached menu keyed by lower-cased product name"""
+    await _get_menu_cached()
+    return _menu_cache["by_name"]
+
+
+def invalidate_menu_cache():
+    """Force the next menu lookup to refetch from the backend"""
+    _menu_cache["expires"] = 0.0
+    # Cached chatbot answers may quote the old menu
+    semantic_cache.clear()
+
+
+def _resolve_from_menu(menu_index: dict, product_name: str, quantity: int) -> dict | None:
+    """Resolve a product name against the cached menu (same shape as /resolve-products)"""
+    # Same rule as Product.findBestMatchByName: exact (case-insensitive) match first,
+    # then the shortest partial match in either direction, ties broken by name
+    name = product_name.lower()
+    found = menu_index.get(name)
+    if not found:
+        partial = [key for key in menu_index if name in key or key in name]
+        if partial:
+            found = menu_index[min(partial, key=lambda key: (len(key), key))]
+
+    if not found:
+        return None
+
+    max_quantity = found.get("max_quantity")
+    available = found.get("available", True) and (max_quantity is None or max_quantity >= quantity)
+    return {
+        "query": product_name,
+        "quantity": quantity,
+        "found": True,
+        "name": found["name"],
+        "price": found["price"],
+        "available": available,
+        "message": "Tersedia" if available else f"Stok tidak cukup. Maksimal {max_quantity} pcs"
+    }
 
 
 @tool
-def get_menu() -> str:
+async def get_menu() -> str:
     """Get the bakery menu with all available products and prices."""
     try:
-        response = http_client.get("/api/chatbot/menu")
-        data = response.json()
-
-        if data.get("success"):
-            menu = data["data"]["menu"]
-            return json.dumps({
-                "success": True,
-                "menu": [
-                    {"name": item["name"], "price": item["price"], "description": item.get("description", "")}
-                    for item in menu
-                ],
-                "total_items": data["data"]["total_products"]
-            }, ensure_ascii=False)
-        else:
-            return json.dumps({"success": False, "error": data.get("error", "Unknown error")})
+        menu = await _get_menu_cached()
+        return _dumps({
+            "success": True,
+            "menu": [
+                {"name": item["name"], "price": item["price"], "description": item.get("description", "")}
+                for item in menu
+            ],
+            "total_items": len(menu)
+        })
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return _dumps({"success": False, "error": str(e)})
 
 
 @tool
-def check_availability(product_name: str, quantity: int = 1) -> str:
+async def check_availability(product_name: str, quantity: int = 1) -> str:
     """Check if a specific product is available and has enough ingredient stock.
 
     Args:
@@ -55,7 +126,7 @@ def check_availability(product_name: str, quantity: int = 1) -> str:
         quantity: Number of units to check availability for
     """
     try:
-        response = http_client.post("/api/chatbot/check-availability", json={
+        response = await http_client.post("/api/chatbot/check-availability", json={
             "products": [{"product_name": product_name, "quantity": quantity}]
         })
         data = response.json()
@@ -63,97 +134,124 @@ def check_availability(product_name: str, quantity: int = 1) -> str:
         if data.get("success"):
             products = data["data"]["products"]
             if not products:
-                return json.dumps({"success": True, "available": False, "message": f"Produk '{product_name}' tidak ditemukan"}, ensure_ascii=False)
+                return _dumps({"success": True, "available": False, "message": f"Produk '{product_name}' tidak ditemukan"})
 
             product = products[0]
-            return json.dumps({
+            return _dumps({
                 "success": True,
                 "available": product["available"],
                 "product_name": product.get("product_name", product_name),
                 "price": product.get("price"),
                 "message": product.get("message", "")
-            }, ensure_ascii=False)
+            })
         else:
-            return json.dumps({"success": False, "error": data.get("error", "Unknown error")})
+            return _dumps({"success": False, "error": data.get("error", "Unknown error")})
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return _dumps({"success": False, "error": str(e)})
 
 
 @tool
-def add_to_cart(product_name: str, quantity: int = 1) -> str:
-    """Add a product to the customer's shopping cart. Use this when a customer wants to order something.
-    The item will be added to their cart. They can add more items before confirming the order.
+async def add_to_cart(items: List[CartItem]) -> str:
+    """Add one or more products to the customer's shopping cart. Use this when a customer wants to order something.
+    Put every product the customer mentions into ONE call. They can add more items before confirming the order.
 
     Args:
-        product_name: Name of the product to add
-        quantity: Number of units to add (default: 1)
+        items: Products to add, each {"product_name": str, "quantity": int} (quantity default: 1)
     """
-    # First check if the product exists and get price
     try:
-        response = http_client.get("/api/chatbot/menu")
-        data = response.json()
+        # Resolve names from the cached menu first
+        try:
+            menu_index = await _get_menu_index()
+        except Exception:
+            menu_index = {}
 
-        if data.get("success"):
-            menu = data["data"]["menu"]
-            # Find the product (case-insensitive partial match)
-            found = None
-            for item in menu:
-                if product_name.lower() in item["name"].lower() or item["name"].lower() in product_name.lower():
-                    found = item
-                    break
-
-            if not found:
-                return json.dumps({
-                    "success": False,
-                    "error": f"Produk '{product_name}' tidak ditemukan di menu. Gunakan get_menu() untuk melihat menu."
-                }, ensure_ascii=False)
-
-            return json.dumps({
-                "success": True,
-                "cart_action": {
-                    "type": "add",
-                    "items": [{"product_name": found["name"], "quantity": quantity, "price": found["price"]}]
-                },
-                "message": f"{quantity}x {found['name']} (Rp {int(float(found['price'])):,}) ditambahkan ke keranjang.".replace(",", ".")
-            }, ensure_ascii=False)
-        else:
-            return json.dumps({"success": False, "error": "Gagal mengambil menu"})
+        # Indexed by input position so the cart keeps the order the customer gave
+        products = [None] * len(items)
+        unresolved = []
+        for index, item in enumerate(items):
+            quantity = item.get("quantity", 1)
+            products[index] = _resolve_from_menu(menu_index, item["product_name"], quantity)
+            if not products[index]:
+                unresolved.append((index, {"product_name": item["product_name"], "quantity": quantity}))
+
+        # Anything not in the cache is resolved in a single backend round-trip
+        if unresolved:
+            response = await http_client.post("/api/chatbot/resolve-products", json={
+                "products": [item for _, item in unresolved]
+            })
+            data = response.json()
+
+            if not data.get("success"):
+                return _dumps({"success": False, "error": data.get("error", "Gagal mengambil menu")})
+            # The backend answers in request order
+            for (index, _), product in zip(unresolved, data["data"]["products"]):
+                products[index] = product
+
+        added = []
+        problems = []
+        for product in products:
+            if not product["found"]:
+                problems.append(f"Produk '{product['query']}' tidak ditemukan di menu. Gunakan get_menu() untuk melihat menu.")
+            elif not product["available"]:
+                problems.append(f"{product['name']}: {product['message']}")
+            else:
+                added.append({"product_name": product["name"], "quantity": product["quantity"], "price": product["price"]})
+
+        if not added:
+            return _dumps({"success": False, "error": " ".join(problems)})
+
+        message = ", ".join(
+            f"{item['quantity']}x {item['product_name']} ({format_rupiah(item['price'])})"
+            for item in added
+        ) + " ditambahkan ke keranjang."
+        if problems:
+            message += " " + " ".join(problems)
+
+        return _dumps({
+            "success": True,
+            "cart_action": {
+                "type": "add",
+                "items": added
+            },
+            "warnings": problems,
+            "message": message
+        })
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return _dumps({"success": False, "error": str(e)})
 
 
 @tool
-def view_cart() -> str:
+async def view_cart() -> str:
     """View the current contents of the customer's shopping cart.
     Use this when the customer asks what's in their cart or wants to review before ordering.
     """
     # Cart state is managed by Node.js; return a signal for the controller to handle
-    return json.dumps({
+    return _dumps({
         "success": True,
         "cart_updated": True,
         "message": "Menampilkan isi keranjang."
-    }, ensure_ascii=False)
+    })
 
 
 @tool
-def remove_from_cart(product_name: str) -> str:
+async def remove_from_cart(product_name: str) -> str:
     """Remove a product from the customer's shopping cart.
 
     Args:
         product_name: Name of the product to remove
     """
-    return json.dumps({
+    return _dumps({
         "success": True,
         "cart_action": {
             "type": "remove",
             "items": [{"product_name": product_name}]
         },
         "message": f"{product_name} dihapus dari keranjang."
-    }, ensure_ascii=False)
+    })
 
 
 @tool
-def confirm_order(customer_name: str = "Guest Customer") -> str:
+async def confirm_order(customer_name: str = "Guest Customer") -> str:
     """Confirm and create the final order from the current cart contents.
     Only call this when the customer explicitly confirms they want to place the order.
 
@@ -162,12 +260,12 @@ def confirm_order(customer_name: str = "Guest Customer") -> str:
     """
     # This is a signal - the actual order creation happens in Node.js controller
     # because it needs the cart data from session store
-    return json.dumps({
+    return _dumps({
         "success": True,
         "confirm_order": True,
         "customer_name": customer_name,
         "message": "Pesanan dikonfirmasi. Memproses order..."
-    }, ensure_ascii=False)
+    })
 
 
 # Export tools list for LangChain
@@ -16,13 +16,56 @@ class Config:
     OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     FUNCTION_MODEL = os.getenv("FUNCTION_MODEL", "functiongemma:270m")
     DIALOG_MODEL = os.getenv("DIALOG_MODEL", "qwen3:8b")
+    EMBED_MODEL = os.getenv("EMBED_MODEL", "nomic-embed-text")
+    
+    # Sampling: deterministic, short detection output; capped dialog length
+    FUNCTION_TEMPERATURE = float(os.getenv("FUNCTION_TEMPERATURE", "0.0"))
+    FUNCTION_TOP_P = float(os.getenv("FUNCTION_TOP_P", "1.0"))
+    FUNCTION_NUM_PREDICT = int(os.getenv("FUNCTION_NUM_PREDICT", "128"))
+    DIALOG_TEMPERATURE = float(os.getenv("DIALOG_TEMPERATURE", "0.1"))
+    DIALOG_NUM_PREDICT = int(os.getenv("DIALOG_NUM_PREDICT", "384"))
+    
+    OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "60"))
+    OLLAMA_MAX_KEEPALIVE = int(os.getenv("OLLAMA_MAX_KEEPALIVE", "16"))
+    
+    # Keep models loaded so the KV cache persists across requests
+    # (-1 = forever, or a duration such as "30m")
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "-1")
+    if OLLAMA_KEEP_ALIVE.lstrip("-").isdigit():
+        OLLAMA_KEEP_ALIVE = int(OLLAMA_KEEP_ALIVE)
+    
+    # Semantic Cache
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+    SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512"))
+    # Skip cache lookup for long conversations (answers depend on context)
+    SEMANTIC_CACHE_MAX_HISTORY = int(os.getenv("SEMANTIC_CACHE_MAX_HISTORY", "8"))
+    
+    # Conversation history: above the threshold, older messages are replaced by a summary
+    HISTORY_SUMMARY_THRESHOLD = int(os.getenv("HISTORY_SUMMARY_THRESHOLD", "12"))
+    HISTORY_RECENT_MESSAGES = int(os.getenv("HISTORY_RECENT_MESSAGES", "4"))
+    # Re-summarize once this many messages have accumulated since the last summary
+    HISTORY_SUMMARY_REFRESH = int(os.getenv("HISTORY_SUMMARY_REFRESH", "8"))
+    HISTORY_SUMMARY_MAX_SESSIONS = int(os.getenv("HISTORY_SUMMARY_MAX_SESSIONS", "1000"))
     
     # Node.js Backend API
     NODEJS_BACKEND_URL = os.getenv("NODEJS_BACKEND_URL", "http://localhost:3000")
     
+    # Menu cache TTL in seconds (Node.js also invalidates on product changes)
+    MENU_CACHE_TTL = float(os.getenv("MENU_CACHE_TTL", "60"))
+    # Cached chatbot answers may quote menu prices; never keep them longer than the menu
+    SEMANTIC_CACHE_TTL = min(float(os.getenv("SEMANTIC_CACHE_TTL", "60")), MENU_CACHE_TTL)
+    
     # Service Configuration
     SERVICE_PORT = int(os.getenv("PYTHON_SERVICE_PORT", "8001"))
     SERVICE_HOST = os.getenv("PYTHON_SERVICE_HOST", "0.0.0.0")
+    # Menu cache, semantic cache and history summaries live in-process; keep one
+    # worker unless that state is moved to shared storage
+    SERVICE_WORKERS = int(os.getenv("WORKERS", "1"))
+    SERVICE_RELOAD = os.getenv("PYTHON_SERVICE_RELOAD", "false").lower() == "true"
+    
+    # Shared secret for the /internal/* endpoints called by Node.js (same value in both
+    # services' .env); when unset, only loopback callers are accepted
+    INTERNAL_SECRET = os.getenv("CHATBOT_INTERNAL_SECRET", "")
     
     # CORS
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000").split(",")
@@ -0,0 +1,17 @@
+"""
+Formatting Helpers
+Indonesian Rupiah formatting shared by tools and the chatbot chain
+"""
+
+# Single translate pass instead of format + replace
+_THOUSANDS = str.maketrans(",", ".")
+
+
+def format_thousands(amount) -> str:
+    """Format an amount with '.' thousands separators, e.g. 75000 -> 75.000"""
+    return format(int(float(amount)), ",d").translate(_THOUSANDS)
+
+
+def format_rupiah(amount) -> str:
+    """Format an amount as Indonesian Rupiah, e.g. Rp 75.000"""
+    return f"Rp {format_thousands(amount)}"
@@ -0,0 +1,30 @@
+"""
+Shared HTTP Clients
+Module-level async clients reused across requests (keepalive pool, HTTP/2)
+
+Closed by the FastAPI shutdown handler in main.py.
+"""
+
+import httpx
+from utils.config import config
+
+# Node.js backend API client
+http_client = httpx.AsyncClient(
+    base_url=config.NODEJS_BACKEND_URL,
+    http2=True,
+    timeout=30.0,
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+)
+
+# Ollama connection settings, shared by ollama_client and the ChatOllama clients.
+# Only connect/write/pool are bounded: a cold model load or a long generation can
+# take minutes before the first byte, so reads never time out (the baseline had no
+# timeout at all); direct ollama_client calls pass their own per-request timeout
+OLLAMA_CLIENT_KWARGS = {
+    "http2": True,
+    "timeout": httpx.Timeout(config.OLLAMA_TIMEOUT, read=None),
+    "limits": httpx.Limits(max_keepalive_connections=config.OLLAMA_MAX_KEEPALIVE),
+}
+
+# Ollama client for direct API calls (embeddings, capability probe, warm-up)
+ollama_client = httpx.AsyncClient(base_url=config.OLLAMA_BASE_URL, **OLLAMA_CLIENT_KWARGS)
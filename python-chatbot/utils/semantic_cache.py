@@ -0,0 +1,103 @@
+"""
+Semantic Response Cache
+Reuses chatbot responses for semantically similar user messages
+
+Embeds the user message via Ollama /api/embed and compares it against
+all cached embeddings with a single matrix-vector product (cosine
+similarity on normalized vectors). Entries are only reused when the
+context signature (cart + prior conversation) matches, so answers never
+leak across carts or sessions.
+Entries expire after SEMANTIC_CACHE_TTL (no longer than the menu cache) and
+are cleared when the menu is invalidated, so prices never outlive the menu.
+If EMBED_MODEL is not pulled the cache disables itself after the first 404.
+"""
+
+import time
+import httpx
+import logging
+import numpy as np
+from typing import Dict, Any, Optional
+from utils.config import config
+from utils.http import ollama_client
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """In-memory semantic cache keyed on (user_message, context_signature)"""
+
+    def __init__(self, threshold: float = config.SEMANTIC_CACHE_THRESHOLD,
+                 max_entries: int = config.SEMANTIC_CACHE_MAX_ENTRIES,
+                 ttl: float = config.SEMANTIC_CACHE_TTL):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # Turned off when the embedding model is missing, so turns stop paying for failed requests
+        self.enabled = True
+        self.clear()
+
+    def clear(self):
+        """Drop all cached responses"""
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._signatures = np.empty(0, dtype=np.int64)
+        self._expires = np.empty(0, dtype=np.float64)
+        self._responses: list = []
+
+    async def embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed text and L2-normalize it; returns None if embedding fails or the cache is disabled"""
+        if not self.enabled:
+            return None
+        try:
+            response = await ollama_client.post("/api/embed", json={
+                "model": config.EMBED_MODEL,
+                "input": text
+            }, timeout=10.0)
+            response.raise_for_status()
+            vector = np.asarray(response.json()["embeddings"][0], dtype=np.float32)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                self.enabled = False
+                logger.error(f"Embedding model {config.EMBED_MODEL} not found, semantic cache disabled: {e}")
+            else:
+                logger.warning(f"Embedding failed, skipping semantic cache: {e}")
+            return None
+        except Exception as e:
+            logger.warning(f"Embedding failed, skipping semantic cache: {e}")
+            return None
+
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        return vector / norm
+
+    def lookup(self, query: np.ndarray, signature: int) -> Optional[Dict[str, Any]]:
+        """Return the most similar cached response with the same signature, if above threshold"""
+        if not self._responses:
+            return None
+
+        valid = (self._signatures == signature) & (self._expires > time.monotonic())
+        sims = np.where(valid, self._matrix @ query, -1.0)
+        best = int(np.argmax(sims))
+        if sims[best] < self.threshold:
+            return None
+        return dict(self._responses[best])
+
+    def store(self, query: np.ndarray, signature: int, response: Dict[str, Any]):
+        """Add a response to the cache, evicting the oldest entry when full"""
+        if not self._responses:
+            self._matrix = query[np.newaxis, :]
+        else:
+            self._matrix = np.vstack([self._matrix, query])
+        self._signatures = np.append(self._signatures, np.int64(signature))
+        self._expires = np.append(self._expires, time.monotonic() + self.ttl)
+        self._responses.append(dict(response))
+
+        if len(self._responses) > self.max_entries:
+            self._matrix = self._matrix[1:]
+            self._signatures = self._signatures[1:]
+            self._expires = self._expires[1:]
+            self._responses.pop(0)
+
+
+# Shared instance: the chain reads/writes it, menu invalidation clears it
+semantic_cache = SemanticCache()
@@ -118,6 +118,69 @@ export const checkAvailability = asyncHandler(async (req, res) => {
     });
 });
 
+/**
+ * POST /api/chatbot/resolve-products
+ * Resolve free-text product names to menu entries in a single round-trip
+ * Input: array of { product_name, quantity }
+ * Returns name, price and availability for each query
+ */
+export const resolveProducts = asyncHandler(async (req, res) => {
+    const { products } = req.body;
+
+    const results = await Promise.all(products.map(async (item) => {
+        const quantity = item.quantity || 1;
+        const product = await Product.findBestMatchByName(item.product_name);
+
+        if (!product) {
+            return {
+                query: item.product_name,
+                quantity,
+                found: false,
+                available: false,
+                message: 'Produk tidak ditemukan'
+            };
+        }
+
+        if (!product.is_available) {
+            return {
+                query: item.product_name,
+                quantity,
+                found: true,
+                product_id: product.id,
+                name: product.name,
+                price: product.selling_price,
+                available: false,
+                message: 'Produk sedang tidak tersedia'
+            };
+        }
+
+        const maxQuantity = await StockManager.getMaxOrderableQuantity(product.id);
+        const canFulfill = maxQuantity.max_quantity >= quantity;
+
+        return {
+            query: item.product_name,
+            quantity,
+            found: true,
+            product_id: product.id,
+            name: product.name,
+            price: product.selling_price,
+            available: canFulfill,
+            max_quantity: maxQuantity.max_quantity,
+            message: canFulfill
+                ? 'Tersedia'
+                : `Stok tidak cukup. Maksimal ${maxQuantity.max_quantity} pcs`
+        };
+    }));
+
+    res.json({
+        success: true,
+        data: {
+            products: results,
+            all_available: results.every(r => r.available)
+        }
+    });
+});
+
 /**
  * POST /api/chatbot/create-order
  * Create order via chatbot
@@ -407,6 +470,7 @@ export const getCustomerOrders = asyncHandler(async (req, res) => {
 export default {
     getMenu,
     checkAvailability,
+    resolveProducts,
     createOrder,
     updateOrder,
     getOrderStatus,
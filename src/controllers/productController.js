@@ -5,6 +5,7 @@
 
 import Product from '../models/Product.js';
 import CostCalculator from '../services/costCalculator.js';
+import ChatbotCache from '../services/chatbotCache.js';
 import { ApiError, asyncHandler } from '../middlewares/errorHandler.js';
 
 /**
@@ -67,6 +68,7 @@ export const createProduct = asyncHandler(async (req, res) => {
         image_url,
         is_available
     });
+    ChatbotCache.invalidateMenu();
 
     res.status(201).json({
         success: true,
@@ -105,6 +107,7 @@ export const updateProduct = asyncHandler(async (req, res) => {
     if (is_available !== undefined) updateData.is_available = is_available;
 
     const product = await Product.update(id, updateData);
+    ChatbotCache.invalidateMenu();
 
     res.json({
         success: true,
@@ -126,6 +129,7 @@ export const deleteProduct = asyncHandler(async (req, res) => {
     }
 
     await Product.delete(id);
+    ChatbotCache.invalidateMenu();
 
     res.json({
         success: true,
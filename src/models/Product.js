@@ -29,6 +29,31 @@ const Product = {
         return rows[0] || null;
     },
 
+    /**
+     * Find best product match for a free-text name (case-insensitive)
+     * Available products first (the chatbot menu cache only holds those), then
+     * exact match, then the shortest partial match in either direction, ties
+     * broken by name. Must stay in sync with _resolve_from_menu in the chatbot.
+     * @param {string} name - Product name as typed by the customer
+     * @returns {Object|null} Product object or null
+     */
+    async findBestMatchByName(name) {
+        // POSITION is a literal substring test, so '%' and '_' in the input are not wildcards
+        const { rows } = await query(
+            `SELECT * FROM products
+             WHERE LOWER(name) = LOWER($1)
+                OR POSITION(LOWER($1) IN LOWER(name)) > 0
+                OR POSITION(LOWER(name) IN LOWER($1)) > 0
+             ORDER BY is_available DESC,
+                      (LOWER(name) = LOWER($1)) DESC,
+                      LENGTH(name) ASC,
+                      LOWER(name) COLLATE "C" ASC
+             LIMIT 1`,
+            [name]
+        );
+        return rows[0] || null;
+    },
+
     /**
      * Get all products
      * @param {Object} options - { page, limit, available_only, search }
@@ -4,6 +4,7 @@
  * 
  * GET /api/chatbot/menu
  * POST /api/chatbot/check-availability
+ * POST /api/chatbot/resolve-products
  * POST /api/chatbot/create-order
  * PUT /api/chatbot/update-order/:id
  * GET /api/chatbot/order-status/:id
@@ -14,6 +15,7 @@ import { Router } from 'express';
 import {
     getMenu,
     checkAvailability,
+    resolveProducts,
     createOrder,
     updateOrder,
     getOrderStatus,
@@ -22,7 +24,8 @@ import {
 import { validate } from '../middlewares/errorHandler.js';
 import {
     chatbotOrderValidator,
-    availabilityCheckValidator
+    availabilityCheckValidator,
+    resolveProductsValidator
 } from '../utils/validators.js';
 
 const router = Router();
@@ -33,6 +36,9 @@ router.get('/menu', getMenu);
 // Availability check
 router.post('/check-availability', availabilityCheckValidator, validate, checkAvailability);
 
+// Batched name → price/availability lookup (used by chatbot add_to_cart)
+router.post('/resolve-products', resolveProductsValidator, validate, resolveProducts);
+
 // Order management
 router.post('/create-order', chatbotOrderValidator, validate, createOrder);
 router.put('/update-order/:id', updateOrder);
@@ -0,0 +1,29 @@
+/**
+ * Chatbot Cache Service
+ * Notifies the Python chatbot service when its cached menu goes stale
+ */
+
+const ChatbotCache = {
+    /**
+     * Invalidate the chatbot's in-process menu cache
+     * Fire-and-forget: failures are only logged (the cache TTL still applies)
+     */
+    invalidateMenu() {
+        const pythonServiceUrl = process.env.PYTHON_CHATBOT_URL || 'http://localhost:8001';
+        // Shared secret checked by the chatbot (without it only loopback calls are accepted)
+        const secret = process.env.CHATBOT_INTERNAL_SECRET;
+        const headers = secret ? { 'X-Internal-Secret': secret } : {};
+
+        fetch(`${pythonServiceUrl}/internal/invalidate-menu`, { method: 'POST', headers })
+            .then(response => {
+                if (!response.ok) {
+                    console.warn(`⚠️ Chatbot menu cache invalidation rejected: HTTP ${response.status}`);
+                }
+            })
+            .catch(error => {
+                console.warn(`⚠️ Failed to invalidate chatbot menu cache: ${error.message}`);
+            });
+    }
+};
+
+export default ChatbotCache;
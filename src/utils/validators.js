@@ -301,3 +301,17 @@ export const availabilityCheckValidator = [
     body('products.*.quantity')
         .isInt({ min: 1 })
 ];
+
+export const resolveProductsValidator = [
+    body('products')
+        .isArray({ min: 1 })
+        .withMessage('Products harus array'),
+    body('products.*.product_name')
+        .trim()
+        .notEmpty()
+        .withMessage('Nama produk diperlukan'),
+    body('products.*.quantity')
+        .optional()
+        .isInt({ min: 1 })
+        .withMessage('Quantity harus minimal 1')
+];